@@ -0,0 +1,49 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# cutoff_ranks.py
+#
+# Shared cleaning of the “cutoff_rank” column, used both when normalizing the
+# extracted CSVs (normalize_cutoffs.py) and when loading them (main.py).
+# ─────────────────────────────────────────────────────────────────────────────
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+INT32_MIN = np.iinfo(np.int32).min
+INT32_MAX = np.iinfo(np.int32).max
+
+# The numeric spellings pd.to_numeric accepts: optional sign, digits with an
+# optional decimal point (“5.”, “.5”), optional exponent. “inf” / “nan” are
+# left out on purpose: to_numeric would accept them, but they never fit in
+# int32 and would be dropped anyway.
+NUMERIC_PATTERN = r"^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$"
+
+
+def clean_cutoff_ranks(table: pa.Table) -> pa.Table:
+    """
+    Returns `table` with its “cutoff_rank” column coerced to int32.
+
+    Accepts exactly what `pd.to_numeric(..., errors="coerce")` accepts
+    (e.g. " 12 ", "400.0", "1e3"), truncating non-integral values the way
+    `.astype(int)` does. Rows whose rank is blank, “--”, otherwise
+    non-numeric, or outside the int32 range are dropped instead of failing
+    the whole load. Everything runs as Arrow compute kernels.
+    """
+    idx = table.schema.get_field_index("cutoff_rank")
+    ranks = table.column(idx)
+
+    if pa.types.is_string(ranks.type) or pa.types.is_large_string(ranks.type):
+        ranks = pc.utf8_trim_whitespace(ranks)
+        # Null out anything that isn't a number so the cast below can't fail
+        is_numeric = pc.match_substring_regex(ranks, NUMERIC_PATTERN)
+        ranks = pc.if_else(is_numeric, ranks, pa.scalar(None, ranks.type))
+    ranks = pc.cast(ranks, pa.float64())
+
+    # Null (non-numeric) ranks compare as null, which filter() drops
+    keep = pc.and_(
+        pc.greater_equal(ranks, INT32_MIN),
+        pc.less_equal(ranks, INT32_MAX),
+    )
+    table = table.filter(keep)
+    # safe=False: truncate 400.5 → 400 instead of raising
+    cleaned = pc.cast(ranks.filter(keep), pa.int32(), safe=False)
+    return table.set_column(idx, "cutoff_rank", cleaned)
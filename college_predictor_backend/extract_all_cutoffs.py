@@ -6,6 +6,8 @@
 # ─────────────────────────────────────────────────────────────────────────────
 import os
 import glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import tabula
 import pandas as pd
 
@@ -15,31 +17,23 @@ import pandas as pd
 PDF_DIR = os.getcwd()
 
 # -------------------------------------------------------------------
-# 2) Create output folder (if it doesn’t already exist)
+# 2) Output folder for the extracted CSVs
 # -------------------------------------------------------------------
 CSV_OUT = os.path.join(PDF_DIR, "cet_cutoffs")
-os.makedirs(CSV_OUT, exist_ok=True)
 
-# -------------------------------------------------------------------
-# 3) Find all matching “_CUTOFF_2024_r1_*.pdf” files
-#    (e.g. “ENGG_CUTOFF_2024_r1_gen_prov.pdf”, etc.)
-# -------------------------------------------------------------------
-pattern = os.path.join(PDF_DIR, "*_CUTOFF_2024_r1_*.pdf")
-pdf_list = glob.glob(pattern)
 
-if not pdf_list:
-    print("⚠️  No PDF files found matching pattern:", pattern)
-else:
-    print(f"✅  Found {len(pdf_list)} PDF(s) to extract.")
+def process_pdf(pdf_path: str, out_csv: str):
+    """
+    Extracts every table from `pdf_path`, concatenates them and writes the
+    result to `out_csv`. Returns (out_csv, rows_written); rows_written is
+    None if the PDF could not be read or contained no tables.
 
-# -------------------------------------------------------------------
-# 4) For each PDF, extract all tables and concatenate
-# -------------------------------------------------------------------
-for pdf_path in pdf_list:
-    base = os.path.basename(pdf_path)
-    name, _ext = os.path.splitext(base)
-    out_csv = os.path.join(CSV_OUT, name + ".csv")
+    tabula-py runs the JVM in-process (jpype), so it starts once per worker
+    process and is reused for every PDF that worker handles.
 
+    Runs inside a worker process, so it only prints and never raises.
+    """
+    base = os.path.basename(pdf_path)
     print(f"→ Processing {base} ...")
 
     try:
@@ -54,22 +48,54 @@ for pdf_path in pdf_list:
         )
     except Exception as e:
         print(f"   ✗ Error reading {base}: {e}")
-        continue
+        return out_csv, None
 
-    if not df_list:
+    # Concatenate all page-tables into a single DataFrame in one shot.
+    # Empty page-tables are dropped first, and a lone table is used as-is
+    # rather than paying for a concat copy. copy=False lets pandas reuse
+    # blocks it would otherwise copy; the frames are never modified after.
+    frames: list[pd.DataFrame] = [tbl for tbl in df_list if not tbl.empty]
+    if not frames:
         print(f"   ⚠️ No tables detected in {base}. Skipping writing CSV.")
-        continue
-
-    # Concatenate all page-tables into a single DataFrame
-    try:
-        combined = pd.concat(df_list, ignore_index=True)
-    except ValueError:
-        # If there is only one table, df_list is a single DataFrame
-        combined = df_list[0]
+        return out_csv, None
+    combined = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True, copy=False)
 
     # Write out the combined CSV
     combined.to_csv(out_csv, index=False)
     print(f"   ✅ Wrote {out_csv} ({combined.shape[0]} rows, {combined.shape[1]} cols)")
+    return out_csv, combined.shape[0]
+
+
+if __name__ == "__main__":
+    os.makedirs(CSV_OUT, exist_ok=True)
+
+    # -------------------------------------------------------------------
+    # 3) Find all matching “_CUTOFF_2024_r1_*.pdf” files
+    #    (e.g. “ENGG_CUTOFF_2024_r1_gen_prov.pdf”, etc.)
+    # -------------------------------------------------------------------
+    pattern = os.path.join(PDF_DIR, "*_CUTOFF_2024_r1_*.pdf")
+    pdf_list = glob.glob(pattern)
+
+    if not pdf_list:
+        print("⚠️  No PDF files found matching pattern:", pattern)
+    else:
+        print(f"✅  Found {len(pdf_list)} PDF(s) to extract.")
+
+    pdf_to_csv = {
+        pdf_path: os.path.join(CSV_OUT, os.path.splitext(os.path.basename(pdf_path))[0] + ".csv")
+        for pdf_path in pdf_list
+    }
 
-print("🎉 Extraction complete. CSVs are under:", CSV_OUT)
+    # -------------------------------------------------------------------
+    # 4) Extract the PDFs in parallel. The files are independent, so each
+    #    is submitted to a pool of worker processes (capped at the CPU
+    #    count); every worker keeps its own in-process JVM across PDFs.
+    # -------------------------------------------------------------------
+    if pdf_to_csv:
+        max_workers = min(os.cpu_count() or 1, len(pdf_to_csv))
+        with ProcessPoolExecutor(max_workers=max_workers) as exe:
+            futures = [exe.submit(process_pdf, p, c) for p, c in pdf_to_csv.items()]
+            for fut in as_completed(futures):
+                fut.result()
 
+    print("🎉 Extraction complete. CSVs are under:", CSV_OUT)
@@ -1,83 +1,265 @@
 # main.py
 
-from fastapi import FastAPI, HTTPException
-from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from cutoff_ranks import clean_cutoff_ranks
+import csv
 import glob
+import hashlib
 import os
+import tempfile
 
 app = FastAPI(
     title="College Cutoff Predictor",
     description="Lookup college/branch cutoffs across multiple courses (ENGG, BSCNURS, PHARMA, agri, etc.)",
     version="1.0.0",
+    # Responses are plain lists of str/int built by us: the endpoints return
+    # orjson-encoded bytes directly, which skips jsonable_encoder +
+    # json.dumps. orjson stays the default for any route returning plain data.
+    default_response_class=ORJSONResponse,
 )
 
 # ────────────────────────────────────────────────────────────────────────────────
-# At startup: read every “*_normalized.csv” file from cet_cutoffs/ and concatenate
-# into a single pandas DataFrame. Then coerce cutoff_rank → numeric and drop NaNs.
+# At startup: read every “*_normalized.parquet” / “*_normalized.csv” file from
+# cet_cutoffs/ and concatenate into a single pandas DataFrame. Then coerce
+# cutoff_rank → numeric and drop NaNs.
+#
+# The prepared DataFrame is cached as a single Parquet file keyed on the input
+# files and their mtimes, so later starts skip the parse/coerce/sort entirely.
 # ────────────────────────────────────────────────────────────────────────────────
 
 DATA_DIR = "cet_cutoffs"
 
-def load_all_normalized_csvs(data_dir: str) -> pd.DataFrame:
+# Part of the cache key: bump it whenever prepare_cutoffs (or anything else
+# that shapes the cached frame) changes, so old caches are not reused.
+CACHE_VERSION = 2
+
+def find_normalized_files(data_dir: str) -> List[str]:
     """
-    Finds every CSV ending in “_normalized.csv” under `data_dir`, reads it,
-    and concatenates into a single DataFrame.
+    Returns every file ending in “_normalized.parquet” or “_normalized.csv”
+    under `data_dir`. When both formats exist for the same table, the Parquet
+    file wins: it is a columnar binary load rather than a CSV parse.
     """
-    pattern = os.path.join(data_dir, "*_normalized.csv")
-    file_list = glob.glob(pattern)
+    paths_by_stem = {}
+    for ext in (".csv", ".parquet"):
+        for path in glob.glob(os.path.join(data_dir, f"*_normalized{ext}")):
+            paths_by_stem[os.path.splitext(path)[0]] = path
+    file_list = sorted(paths_by_stem.values())
     if not file_list:
-        # If no “_normalized.csv” exists, raise an error
-        raise RuntimeError(f"No normalized CSVs found under {data_dir!r} (looking for '*_normalized.csv').")
+        # If no “_normalized” file exists, raise an error
+        raise RuntimeError(
+            f"No normalized files found under {data_dir!r} "
+            "(looking for '*_normalized.parquet' or '*_normalized.csv')."
+        )
+    return file_list
+
+def read_normalized_table(path: str) -> pa.Table:
+    """
+    Reads one normalized file into an Arrow Table, keeping every CSV column
+    as a string (blank cells stay "", not null) and cutoff_rank as int32.
+    Rows whose cutoff_rank is not numeric (or doesn't fit in int32) are
+    dropped; see cutoff_ranks.clean_cutoff_ranks.
+    """
+    if path.endswith(".parquet"):
+        # memory_map=True: let the kernel map the file rather than
+        # reading it through a userspace buffer first
+        table = pq.read_table(path, memory_map=True)
+    else:
+        # utf-8-sig: pyarrow skips a leading BOM, so the header has to as
+        # well or the first column would miss its column_types entry
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            header = next(csv.reader(f))
+        table = pacsv.read_csv(
+            path,
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in header},
+            ),
+        )
+
+    return clean_cutoff_ranks(table)
+
+def load_all_normalized_files(file_list: List[str]) -> pd.DataFrame:
+    """
+    Reads every normalized file in `file_list` and concatenates them into a
+    single DataFrame. Parsing, the concat and the cutoff_rank coercion all
+    happen on Arrow tables; only the final table is converted to pandas.
+    """
+    tables = [read_normalized_table(path) for path in file_list]
+    # "permissive": CSV and Parquet tables may differ in string width
+    # (string vs large_string)
+    table = pa.concat_tables(tables, promote_options="permissive")
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def prepare_cutoffs(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turns the concatenated tables (cutoff_rank already cleaned to int32) into
+    the frame the endpoints serve from: sorted by cutoff_rank, with
+    categorical key columns.
+    """
+    # pyarrow-backed int32 → plain NumPy int32 for the shard arrays
+    df["cutoff_rank"] = df["cutoff_rank"].astype("int32")
+
+    # Sort once by cutoff_rank. Every shard built below inherits this order, so
+    # /find can bisect for the rank threshold instead of masking and re-sorting.
+    df = df.sort_values("cutoff_rank", kind="mergesort").reset_index(drop=True)
 
-    dfs = []
-    for path in sorted(file_list):
-        df = pd.read_csv(path, dtype=str, keep_default_na=False)
-        dfs.append(df)
+    # If your normalized CSVs do not include college_code/college_name, comment out these two lines:
+    # Otherwise, keep them. If they’re missing, Pandas will create those columns as NaN.
+    if "college_code" not in df.columns:
+        # Create a dummy column so that code below never breaks
+        df["college_code"] = ""
+    if "college_name" not in df.columns:
+        df["college_name"] = ""
 
-    merged = pd.concat(dfs, ignore_index=True)
-    return merged
+    # The key columns hold a handful of distinct strings each: store them as
+    # categoricals (small integer codes) instead of one Python object per cell.
+    for col in ("course", "category", "branch", "college_code"):
+        df[col] = df[col].astype("category")
+
+    return df
+
+def load_cutoffs(data_dir: str) -> pd.DataFrame:
+    """
+    Returns the prepared cutoffs DataFrame, from the Parquet cache under
+    `data_dir` if it matches the current input files, otherwise by loading and
+    preparing the normalized files (and refreshing the cache).
+    """
+    file_list = find_normalized_files(data_dir)
+    cache_key = hashlib.sha1(
+        repr((
+            CACHE_VERSION,
+            [(os.path.basename(p), os.path.getmtime(p)) for p in file_list],
+        )).encode()
+    ).hexdigest()
+    cache_path = os.path.join(data_dir, f"_cache_{cache_key}.parquet")
+
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_parquet(cache_path, engine="pyarrow", memory_map=True)
+        except Exception:
+            # Unreadable cache (e.g. cut short): rebuild it below.
+            pass
+
+    df = prepare_cutoffs(load_all_normalized_files(file_list))
+
+    # Best effort: a read-only data dir just means no cache next time.
+    # Write to a temp file and rename it into place, so a reader (or another
+    # worker starting up) never sees a half-written cache.
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=data_dir, prefix="_cache_", suffix=".tmp")
+        os.close(fd)
+        try:
+            df.to_parquet(tmp_path, engine="pyarrow", compression="zstd", index=False)
+            os.chmod(tmp_path, 0o644)  # mkstemp creates it 0600
+            os.replace(tmp_path, cache_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        # Drop caches for older inputs; never the one just written
+        for stale in glob.glob(os.path.join(data_dir, "_cache_*.parquet")):
+            if stale != cache_path:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+
+    return df
 
 try:
-    df_all = load_all_normalized_csvs(DATA_DIR)
+    df_all = load_cutoffs(DATA_DIR)
 except Exception as e:
-    # If startup fails (e.g. missing folder or no CSVs), crash quickly.
-    raise RuntimeError(f"Failed to load normalized CSVs: {e!s}")
-
-# Coerce cutoff_rank to numeric. Any non‐numeric values become NaN → then drop them.
-df_all["cutoff_rank"] = pd.to_numeric(df_all["cutoff_rank"], errors="coerce")
-df_all = df_all.dropna(subset=["cutoff_rank"])
-df_all["cutoff_rank"] = df_all["cutoff_rank"].astype(int)
-
-# If your normalized CSVs do not include college_code/college_name, comment out these two lines:
-# Otherwise, keep them. If they’re missing, Pandas will create those columns as NaN.
-if "college_code" not in df_all.columns:
-    # Create a dummy column so that code below never breaks
-    df_all["college_code"] = ""
-if "college_name" not in df_all.columns:
-    df_all["college_name"] = ""
-
-# Precompute sorted, unique lists for the dropdown endpoints:
-all_courses    = sorted(df_all["course"].dropna().unique().tolist())
-all_categories = sorted(df_all["category"].dropna().unique().tolist())
-all_branches   = sorted(df_all["branch"].dropna().unique().tolist())
+    # If startup fails (e.g. missing folder or no normalized files), crash quickly.
+    raise RuntimeError(f"Failed to load normalized cutoffs: {e!s}")
+
+# Precompute sorted, unique lists for the dropdown endpoints. The categorical
+# dtype already holds them as sorted categories, so no hashing/sorting is
+# needed; the frozensets give O(1) validation in /find.
+all_courses    = df_all["course"].cat.categories.tolist()
+all_categories = df_all["category"].cat.categories.tolist()
+all_branches   = df_all["branch"].cat.categories.tolist()
+
+valid_courses    = frozenset(all_courses)
+valid_categories = frozenset(all_categories)
+valid_branches   = frozenset(all_branches)
+
+# The dropdown payloads never change: encode them to JSON bytes once.
+all_courses_json    = orjson.dumps(all_courses)
+all_categories_json = orjson.dumps(all_categories)
+all_branches_json   = orjson.dumps(all_branches)
+
+# Index the rows by (course, category) and by (course, category, branch) once,
+# so /find fetches its shard with a dict lookup instead of masking df_all.
+# Each shard is kept as parallel NumPy arrays (college_code, college_name,
+# branch, cutoff_rank); groupby keeps the row order within each group, so
+# every cutoff_rank array stays sorted and a lookup is one searchsorted plus
+# four slices — no pandas on the request path.
+#
+# Each shard also carries its rows already encoded as JSON: one buffer of
+# every row joined by ",", plus the byte offset where each row starts. A /find
+# answer is then the buffer's tail from the bisected row, wrapped in "[…]",
+# for any rank; memory stays at one encoded copy of the rows per index.
+def _row_dict(course, category, code, name, branch, cutoff) -> dict:
+    return {
+        "course":       course,
+        "college_code": code,
+        "college_name": name,
+        "branch":       branch,
+        "category":     category,
+        "cutoff_rank":  int(cutoff),
+    }
+
+def encode_rows(course, category, codes, names, branches, ranks) -> Tuple[bytes, np.ndarray]:
+    rows = [
+        orjson.dumps(_row_dict(course, category, code, name, row_branch, cutoff))
+        for code, name, row_branch, cutoff in zip(codes, names, branches, ranks)
+    ]
+    # offsets[i] = where row i starts in the joined buffer (each earlier row
+    # is followed by one ","); offsets[len(rows)] points past the end
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) + 1 for row in rows], out=offsets[1:])
+    return b",".join(rows), offsets
+
+def build_shards(keys: List[str]) -> Dict[tuple, Tuple]:
+    shards = {}
+    for key, group in df_all.groupby(keys, sort=False, observed=True):
+        codes    = group["college_code"].to_numpy(dtype=object)
+        names    = group["college_name"].to_numpy(dtype=object)
+        branches = group["branch"].to_numpy(dtype=object)
+        ranks    = group["cutoff_rank"].to_numpy(dtype=np.int32)
+        # key starts with (course, category) for both indexes
+        rows_json, offsets = encode_rows(key[0], key[1], codes, names, branches, ranks)
+        shards[key] = (codes, names, branches, ranks, rows_json, offsets)
+    return shards
+
+shards_by_course_category        = build_shards(["course", "category"])
+shards_by_course_category_branch = build_shards(["course", "category", "branch"])
 
 # ────────────────────────────────────────────────────────────────────────────────
 #   GET /courses
 #   Returns a JSON array of all available “course” strings (e.g. ["ENGG","BSCNURS","PHARMA","agri",…]).
 # ────────────────────────────────────────────────────────────────────────────────
-@app.get("/courses", response_model=List[str])
-def get_courses():
-    return all_courses
+@app.get("/courses", response_model=None)
+async def get_courses():
+    return Response(all_courses_json, media_type="application/json")
 
 
 # ────────────────────────────────────────────────────────────────────────────────
 #   GET /categories
 #   Returns a JSON array of all available “category” strings (e.g. ["1G","1K","1R","2AG",…,"GM","SCG","…"]).
 # ────────────────────────────────────────────────────────────────────────────────
-@app.get("/categories", response_model=List[str])
-def get_categories():
-    return all_categories
+@app.get("/categories", response_model=None)
+async def get_categories():
+    return Response(all_categories_json, media_type="application/json")
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -85,9 +267,9 @@ def get_categories():
 #   Returns a JSON array of all available “branch” strings 
 #   (e.g. ["AI Artificial Intelligence","AR Architecture","CE Civil","CS Computers",…]).
 # ────────────────────────────────────────────────────────────────────────────────
-@app.get("/branches", response_model=List[str])
-def get_branches():
-    return all_branches
+@app.get("/branches", response_model=None)
+async def get_branches():
+    return Response(all_branches_json, media_type="application/json")
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -97,6 +279,9 @@ def get_branches():
 #     • category (e.g. “GM”)
 #     • rank     (an integer; we will return only rows whose cutoff_rank >= rank)
 #     • branch   (optional; e.g. “EE Electrical”). If provided, filter to exactly that branch.
+#     • stream   (optional; default false). If true, stream the objects as
+#                newline-delimited JSON (application/x-ndjson), one per line,
+#                instead of returning a single array.
 #
 #   Returns: a JSON array of objects, each having:
 #     {
@@ -110,45 +295,99 @@ def get_branches():
 #
 #   The result set is sorted in ascending order of cutoff_rank.
 # ────────────────────────────────────────────────────────────────────────────────
-@app.get("/find")
-def find_colleges(
+@app.get("/find", response_model=None)
+async def find_colleges(
     course: str,
     category: str,
     rank: int,
-    branch: Optional[str] = None
+    branch: Optional[str] = None,
+    stream: bool = False,
 ):
-    # Validate course/category
-    if course not in all_courses:
+    # Validate course/category/branch
+    if course not in valid_courses:
         raise HTTPException(status_code=400, detail=f"Invalid course: {course!r}")
-    if category not in all_categories:
+    if category not in valid_categories:
         raise HTTPException(status_code=400, detail=f"Invalid category: {category!r}")
+    if branch and branch not in valid_branches:
+        raise HTTPException(status_code=400, detail=f"Invalid branch: {branch!r}")
 
-    # Filter the DataFrame
-    df_filtered = df_all[
-        (df_all["course"] == course) &
-        (df_all["category"] == category) &
-        (df_all["cutoff_rank"] >= rank)
-    ]
+    branch = branch or ""
+    start = _find_start(course, category, branch, rank)
+
+    if stream:
+        # Large result sets: send the rows in batches as they are encoded
+        # instead of materializing the whole array first.
+        return StreamingResponse(
+            _iter_ndjson_chunks(course, category, branch, start),
+            media_type="application/x-ndjson",
+        )
 
+    return Response(_find_json(course, category, branch, start), media_type="application/json")
+
+
+def _get_shard(course: str, category: str, branch: str):
     if branch:
-        if branch not in all_branches:
-            raise HTTPException(status_code=400, detail=f"Invalid branch: {branch!r}")
-        df_filtered = df_filtered[df_filtered["branch"] == branch]
-
-    # Sort ascending by cutoff_rank
-    df_filtered = df_filtered.sort_values("cutoff_rank", ascending=True)
-
-    # Build the JSON array
-    results = []
-    for _, row in df_filtered.iterrows():
-        results.append({
-            "course":       row["course"],
-            "college_code": row["college_code"],   # "" if not present
-            "college_name": row["college_name"],   # "" if not present
-            "branch":       row["branch"],
-            "category":     row["category"],
-            "cutoff_rank":   int(row["cutoff_rank"]),
-        })
-
-    return results
+        return shards_by_course_category_branch.get((course, category, branch))
+    return shards_by_course_category.get((course, category))
+
+
+def _find_start(course: str, category: str, branch: str, rank: int) -> int:
+    """
+    Index of the first row with cutoff_rank >= rank in the shard for
+    (course, category[, branch]); 0 if there is no such shard.
+    """
+    shard = _get_shard(course, category, branch)
+    if shard is None:
+        return 0
+    ranks = shard[3]
+    # Shards are already sorted ascending by cutoff_rank: bisect to the first
+    # row with cutoff_rank >= rank; the result is everything from there on.
+    return int(np.searchsorted(ranks, rank, side="left"))
+
+
+# Rows per chunk of a streamed /find response
+STREAM_CHUNK_ROWS = 256
+
+
+async def _iter_ndjson_chunks(course: str, category: str, branch: str, start: int):
+    """
+    Yields the /find rows as newline-delimited JSON, STREAM_CHUNK_ROWS lines
+    per chunk. An async generator runs on the event loop, so Starlette
+    doesn't hop to the threadpool for every chunk, and batching keeps the
+    number of writes small.
+    """
+    lines = []
+    for row in _iter_rows(course, category, branch, start):
+        lines.append(orjson.dumps(row))
+        if len(lines) == STREAM_CHUNK_ROWS:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def _find_json(course: str, category: str, branch: str, start: int) -> bytes:
+    """
+    The /find JSON array for the rows from `start` on, sliced out of the
+    shard's pre-encoded rows. `branch` is "" when no branch filter was
+    requested. No encoding happens per request, so the endpoints run
+    directly on the event loop (async def) rather than paying a threadpool
+    hand-off per request.
+    """
+    shard = _get_shard(course, category, branch)
+    if shard is None:
+        return b"[]"
+    rows_json, offsets = shard[4], shard[5]
+    return b"[" + rows_json[offsets[start]:] + b"]"
+
+
+def _iter_rows(course: str, category: str, branch: str, start: int) -> Iterator[dict]:
+    shard = _get_shard(course, category, branch)
+    if shard is None:
+        return
+    codes, names, branches, ranks = shard[:4]
 
+    for code, name, row_branch, cutoff in zip(
+        codes[start:], names[start:], branches[start:], ranks[start:]
+    ):
+        yield _row_dict(course, category, code, name, row_branch, cutoff)
@@ -2,12 +2,16 @@
 import os
 import glob
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cutoff_ranks import clean_cutoff_ranks
 
 # ──────────────────────────────────────────────────────────────
 # Change these two paths if you put your CSVs somewhere else
 INPUT_DIR  = "cet_cutoffs"    # folder containing the wide‐format CSVs
 OUTPUT_DIR = "cet_cutoffs"    # we will write back into the same folder,
-                             # but with “_normalized.csv” appended
+                             # but with “_normalized.parquet” appended
 # ──────────────────────────────────────────────────────────────
 
 if not os.path.isdir(INPUT_DIR):
@@ -15,7 +19,7 @@ if not os.path.isdir(INPUT_DIR):
 
 for in_path in glob.glob(os.path.join(INPUT_DIR, "*.csv")):
     fname = os.path.basename(in_path)  # e.g. "ENGG_CUTOFF_2024_r1_gen.csv"
-    base, ext = os.path.splitext(fname)
+    base, _ext = os.path.splitext(fname)
     if base.endswith("_normalized"):
         # skip anything that is already normalized
         continue
@@ -27,16 +31,20 @@ for in_path in glob.glob(os.path.join(INPUT_DIR, "*.csv")):
     # Read the “wide” table
     df_wide = pd.read_csv(in_path, dtype=str, keep_default_na=False)
 
-    # The very first column is the branch name (often called “Unnamed: 0” or similar)
-    branch_col = df_wide.columns[0].strip()
-    df_wide.rename(columns={df_wide.columns[0]: "branch"}, inplace=True)
+    # The very first column is the branch name (often called “Unnamed: 0” or
+    # similar); the rest are category headings. Name/strip them in one go.
+    df_wide.columns = ["branch", *df_wide.columns[1:].str.strip()]
 
     # If the branch names are split across multiple rows (e.g. “AI Artificial” on
     # row 1 and “Intelligence” on row 2), we want to forward‐fill them:
     df_wide["branch"] = df_wide["branch"].ffill()
 
+    # Strip whitespace in branch once, on the wide table: that is one pass
+    # per row instead of one per cell of the melted table.
+    df_wide["branch"] = df_wide["branch"].str.strip()
+
     # Drop any “header‐placeholder” row where branch == column name
-    df_wide = df_wide[df_wide["branch"].str.strip() != "branch"]
+    df_wide = df_wide[df_wide["branch"] != "branch"]
 
     # Now “melt” the category columns into (category, cutoff_rank)
     # All columns except “branch” become “category” headings
@@ -46,25 +54,27 @@ for in_path in glob.glob(os.path.join(INPUT_DIR, "*.csv")):
         value_name="cutoff_rank",
     )
 
-    # Remove any rows where cutoff_rank is blank or “--”
-    melted = melted[~melted["cutoff_rank"].isin(["", "--", "-", "–"])]
-
-    # Strip whitespace in category & branch
-    melted["category"]   = melted["category"].str.strip()
-    melted["branch"]     = melted["branch"].str.strip()
-    melted["cutoff_rank"] = melted["cutoff_rank"].str.strip()
-
     # Insert course as the very first column
     melted.insert(0, "course", course)
 
     # Re‐order columns just to be safe
     melted = melted[["course", "branch", "category", "cutoff_rank"]]
 
-    # Write out the “normalized” CSV
-    out_fname = f"{base}_normalized.csv"
+    # Hand the table to Arrow for writing
+    # (pandas metadata is dropped: it would still describe cutoff_rank as text)
+    tbl = pa.Table.from_pandas(melted, preserve_index=False).replace_schema_metadata(None)
+
+    # Coerce cutoff_rank to int32 (category & branch are already stripped).
+    # Blank / “--” / other non-numeric or out-of-range ranks are dropped, using
+    # the same rules main.py applies when it loads the files.
+    tbl = clean_cutoff_ranks(tbl)
+
+    # Write out the “normalized” Parquet file (columnar, zstd-compressed;
+    # main.py reads it in preference to a “_normalized.csv”)
+    out_fname = f"{base}_normalized.parquet"
     out_path = os.path.join(OUTPUT_DIR, out_fname)
-    melted.to_csv(out_path, index=False)
-    print(f"✅  Wrote {out_fname}  →  ({len(melted):,} rows)\n")
+    pq.write_table(tbl, out_path, compression="zstd")
+    print(f"✅  Wrote {out_fname}  →  ({tbl.num_rows:,} rows)\n")
 
 print("🎉  All done.")
 